@@ -0,0 +1,92 @@
+"""Benchmark streaming admission exports.
+
+Usage: python -m benchmarks.bench_report_export [rows] [db_path]
+
+Fills an admissions table with `rows` synthetic rows (default 2,000,000) and,
+for each export format, unfiltered and for a one-quarter date range, reports
+rows/sec (untraced pass), peak traced Python heap (separate traced pass) and
+the process RSS growth of the export. Each case runs in its own subprocess so
+ru_maxrss is not already set by populating the table.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+from database.db_handler import DatabaseHandler
+from utils.report_generator import ReportGenerator
+
+
+def populate(db, rows, chunk=50000):
+    existing = db.fetch_one("SELECT COUNT(*) AS n FROM admissions")["n"]
+    for start in range(existing, rows, chunk):
+        batch = [(i % 5000 + 1, i % 800 + 1, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}")
+                 for i in range(start, min(start + chunk, rows))]
+        db.cursor.executemany(
+            "INSERT INTO admissions (patient_id, bed_id, date_in) VALUES (?, ?, ?)", batch)
+        db.conn.commit()
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def run_case(db_path, out, fmt, date_from, date_to):
+    """Run one export case in this process and return its measurements."""
+    db = DatabaseHandler(db_path)
+    report = ReportGenerator(db)
+    rss_before = peak_rss_mb()
+    t0 = time.perf_counter()
+    n = report.export_admissions(out, fmt, date_from=date_from, date_to=date_to)
+    elapsed = time.perf_counter() - t0
+    rss_after = peak_rss_mb()
+    tracemalloc.start()
+    report.export_admissions(out, fmt, date_from=date_from, date_to=date_to)
+    _, heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    return {"rows": n, "rows_per_sec": n / elapsed, "heap_kib": heap / 1024,
+            "rss_before_mb": rss_before, "rss_growth_mb": rss_after - rss_before,
+            "size_mb": os.path.getsize(out) / 1e6}
+
+
+def main():
+    if sys.argv[1:2] == ["--case"]:
+        db_path, out, fmt, date_from, date_to = sys.argv[2:7]
+        print(json.dumps(run_case(db_path, out, fmt, date_from or None, date_to or None)))
+        return
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    tmp = tempfile.TemporaryDirectory()
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tmp.name, "bench.db")
+    db = DatabaseHandler(db_path)
+    db.initialize_db()
+    populate(db, rows)
+    db.close()
+    cases = [(fmt, "", "") for fmt in ReportGenerator.EXPORT_FORMATS]
+    cases += [(fmt, "2024-01-01", "2024-03-31") for fmt in ReportGenerator.EXPORT_FORMATS]
+    for fmt, date_from, date_to in cases:
+        label = f"{fmt} {'Q1' if date_from else 'all'}"
+        out = os.path.join(tmp.name, f"admissions.{fmt}")
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_report_export", "--case",
+             db_path, out, fmt, date_from, date_to],
+            capture_output=True, text=True, check=True)
+        r = json.loads(proc.stdout)
+        print(f"{label:12s} {r['rows']:>10d} rows  {r['rows_per_sec']:>10.0f} rows/s  "
+              f"heap {r['heap_kib']:>7.1f} KiB  RSS {r['rss_before_mb']:>6.1f} "
+              f"+{r['rss_growth_mb']:>5.1f} MB  {r['size_mb']:>8.1f} MB")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Concurrency stress harness for the admission write path.
+
+Usage: python -m benchmarks.stress_admissions [workers] [ops] [beds] [thread|process] [db_path] [busy_timeout_ms]
+
+Runs `workers` clients, each with its own connection to a shared database
+file, doing `ops` randomized admit/transfer/discharge calls. Afterwards it
+checks the booking invariants and reports throughput plus:
+
+- rejected: the target bed was already occupied in the committed state the
+  worker read just before the call (not contention, just a busy ward)
+- lost races: the pre-read said the call should succeed but another client
+  got there first
+- retries: "database is locked" after the (deliberately short) busy timeout
+- lock wait: time spent acquiring the write lock in BEGIN IMMEDIATE
+
+Exits non-zero if any invariant is violated.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from database.db_handler import DatabaseHandler
+from managers.admission_manager import AdmissionManager
+from managers.bed_manager import BedManager
+from managers.snapshot_manager import SnapshotManager
+
+MAX_RETRIES = 20
+
+
+class _LockTimingCursor:
+    """Cursor wrapper that adds the time spent in BEGIN IMMEDIATE to `stats`."""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, query, params=()):
+        if query != "BEGIN IMMEDIATE":
+            return self._cursor.execute(query, params)
+        t0 = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params)
+        finally:
+            self._stats["lock_wait"] += time.perf_counter() - t0
+            self._stats["transactions"] += 1
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def setup_db(db_path, beds, patients):
+    db = DatabaseHandler(db_path)
+    db.initialize_db()
+    # WAL lets readers run alongside the single writer
+    db.execute_query("PRAGMA journal_mode=WAL")
+    bm = BedManager(db)
+    for i in range(beds):
+        bm.add_bed(("ICU", "HDU", "Maternity", "General")[i % 4], [])
+    db.cursor.executemany("INSERT INTO patients (name, age, diagnosis) VALUES (?, ?, ?)",
+                          [(f"Patient {i}", 40, "Stress") for i in range(patients)])
+    db.conn.commit()
+    db.close()
+
+
+def _worker(args):
+    db_path, worker_id, ops, seed, busy_timeout_ms = args
+    rng = random.Random(seed + worker_id)
+    stats = {"ops": 0, "rejected": 0, "lost_races": 0, "retries": 0, "failed": 0,
+             "lock_wait": 0.0, "transactions": 0}
+    db = DatabaseHandler(db_path)
+    db.execute_query(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    db.cursor = _LockTimingCursor(db.cursor, stats)
+    am = AdmissionManager(db, BedManager(db))
+    bed_ids = [r["bed_id"] for r in db.fetch_all("SELECT bed_id FROM beds")]
+    patient_ids = [r["patient_id"]
+                   for r in db.fetch_all("SELECT patient_id FROM patients")]
+
+    def bed_free(bed_id):
+        return db.fetch_one("SELECT status FROM beds WHERE bed_id=?", (bed_id,))["status"] != "occupied"
+
+    for _ in range(ops):
+        action = rng.choice(("admit", "admit", "transfer", "discharge"))
+        for _attempt in range(MAX_RETRIES):
+            # whether the committed state just before the call says it should succeed
+            expect_ok = True
+            try:
+                if action == "admit":
+                    bed_id = rng.choice(bed_ids)
+                    expect_ok = bed_free(bed_id)
+                    am.admit(rng.choice(patient_ids), bed_id)
+                else:
+                    row = db.fetch_one(
+                        "SELECT admission_id FROM admissions WHERE date_out IS NULL ORDER BY RANDOM() LIMIT 1")
+                    if not row:
+                        break
+                    if action == "transfer":
+                        bed_id = rng.choice(bed_ids)
+                        expect_ok = bed_free(bed_id)
+                        am.transfer(row["admission_id"], bed_id)
+                    else:
+                        am.discharge(row["admission_id"])
+                stats["ops"] += 1
+                break
+            except ValueError:
+                stats["lost_races" if expect_ok else "rejected"] += 1
+                break
+            except sqlite3.OperationalError:
+                # database is locked past the busy timeout
+                stats["retries"] += 1
+                time.sleep(rng.random() * 0.01)
+        else:
+            stats["failed"] += 1
+    db.close()
+    return stats
+
+
+def check_invariants(db_path, snapshot_path=None):
+    """Return a list of human-readable invariant violations (empty if consistent).
+
+    Ward counters are taken from the warm-started snapshot at `snapshot_path`
+    (replaying logged deltas), or rebuilt from the beds table if not given.
+    """
+    db = DatabaseHandler(db_path)
+    problems = []
+    for row in db.fetch_all(
+            "SELECT bed_id, COUNT(*) AS n FROM admissions WHERE date_out IS NULL GROUP BY bed_id HAVING n > 1"):
+        problems.append(
+            f"bed {row['bed_id']} has {row['n']} open admissions")
+    for row in db.fetch_all(
+            """SELECT b.bed_id, b.status, COUNT(a.admission_id) AS n FROM beds b
+               LEFT JOIN admissions a ON a.bed_id = b.bed_id AND a.date_out IS NULL
+               GROUP BY b.bed_id
+               HAVING (b.status = 'occupied') != (n > 0)"""):
+        problems.append(
+            f"bed {row['bed_id']} is {row['status']} with {row['n']} open admissions")
+    counts = {r["ward_type"]: [r["total"], r["occupied"]] for r in db.fetch_all(
+        "SELECT ward_type, COUNT(*) AS total, SUM(status='occupied') AS occupied FROM beds GROUP BY ward_type")}
+    sm = SnapshotManager(db, snapshot_path or os.devnull)
+    state = sm.load() if snapshot_path else sm.rebuild()
+    state.close()
+    if state.ward_counts != counts:
+        problems.append(
+            f"ward counters {state.ward_counts} do not match beds {counts}")
+    db.close()
+    return problems
+
+
+def run_stress(db_path, workers=8, ops=200, beds=20, mode="thread", seed=0, busy_timeout_ms=20):
+    setup_db(db_path, beds, patients=beds * 5)
+    snapshot_path = f"{db_path}.snapshot"
+    db = DatabaseHandler(db_path)
+    sm = SnapshotManager(db, snapshot_path)
+    state = sm.load()
+    sm.save(state)
+    state.close()
+    db.close()
+    pool_cls = ThreadPoolExecutor if mode == "thread" else ProcessPoolExecutor
+    t0 = time.perf_counter()
+    with pool_cls(max_workers=workers) as pool:
+        results = list(pool.map(
+            _worker, [(db_path, i, ops, seed, busy_timeout_ms) for i in range(workers)]))
+    elapsed = time.perf_counter() - t0
+    totals = {k: sum(r[k] for r in results) for k in results[0]}
+    attempts = totals["ops"] + totals["rejected"] + \
+        totals["lost_races"] + totals["failed"]
+    totals.update({
+        "elapsed": elapsed,
+        "ops_per_sec": totals["ops"] / elapsed if elapsed else 0.0,
+        "rejected_rate": totals["rejected"] / attempts if attempts else 0.0,
+        "lost_race_rate": totals["lost_races"] / attempts if attempts else 0.0,
+        "retry_rate": totals["retries"] / attempts if attempts else 0.0,
+        "mean_lock_wait_ms": (1000 * totals["lock_wait"] / totals["transactions"]
+                              if totals["transactions"] else 0.0),
+        "violations": check_invariants(db_path, snapshot_path),
+    })
+    return totals
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    beds = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    mode = sys.argv[4] if len(sys.argv) > 4 else "thread"
+    tmp = tempfile.TemporaryDirectory()
+    db_path = sys.argv[5] if len(sys.argv) > 5 and sys.argv[5] else os.path.join(
+        tmp.name, "stress.db")
+    busy_timeout_ms = int(sys.argv[6]) if len(sys.argv) > 6 else 20
+    res = run_stress(db_path, workers, ops, beds, mode, busy_timeout_ms=busy_timeout_ms)
+    print(f"{workers} {mode} workers x {ops} ops on {beds} beds in {res['elapsed']:.2f}s "
+          f"(busy timeout {busy_timeout_ms} ms)")
+    print(f"committed {res['ops']}  ({res['ops_per_sec']:.0f} ops/s)")
+    print(f"rejected: bed occupied {res['rejected']} ({res['rejected_rate']:.1%})  "
+          f"lost races {res['lost_races']} ({res['lost_race_rate']:.1%})")
+    print(f"retries {res['retries']} ({res['retry_rate']:.1%})  failed {res['failed']}  "
+          f"lock wait {res['lock_wait']:.2f}s total, {res['mean_lock_wait_ms']:.2f} ms "
+          f"mean over {res['transactions']} transactions")
+    for problem in res["violations"]:
+        print("VIOLATION:", problem)
+    tmp.cleanup()
+    sys.exit(1 if res["violations"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import sqlite3
 import os
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -9,12 +10,32 @@ class DatabaseHandler:
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
+        self._in_transaction = False
 
     def execute_query(self, query, params=()):
         cur = self.cursor.execute(query, params)
-        self.conn.commit()
+        if not self._in_transaction:
+            self.conn.commit()
         return cur
 
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed statements atomically, holding the write lock from the first read."""
+        if self._in_transaction:
+            yield
+            return
+        self.conn.commit()
+        self.cursor.execute("BEGIN IMMEDIATE")
+        self._in_transaction = True
+        try:
+            yield
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self._in_transaction = False
+
     def fetch_all(self, query, params=()):
         cur = self.cursor.execute(query, params)
         return cur.fetchall()
@@ -47,12 +68,49 @@ class DatabaseHandler:
             FOREIGN KEY (patient_id) REFERENCES patients(patient_id),
             FOREIGN KEY (bed_id) REFERENCES beds(bed_id)
         );
+        CREATE INDEX IF NOT EXISTS idx_admissions_date_in ON admissions(date_in);
         CREATE TABLE IF NOT EXISTS users (
             user_id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE NOT NULL,
             password_hash TEXT NOT NULL,
             role TEXT NOT NULL
         );
+        CREATE TABLE IF NOT EXISTS state_changes (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            UNIQUE (table_name, row_id)
+        );
+        CREATE TABLE IF NOT EXISTS snapshot_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            pruned_through INTEGER NOT NULL,
+            db_id INTEGER NOT NULL
+        );
+        -- only log once a snapshot manager has enabled it; one row per changed row
+        CREATE TRIGGER IF NOT EXISTS trg_beds_insert AFTER INSERT ON beds
+        WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN
+            INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('beds', NEW.bed_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_beds_update AFTER UPDATE ON beds
+        WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN
+            INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('beds', NEW.bed_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_beds_delete AFTER DELETE ON beds
+        WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN
+            INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('beds', OLD.bed_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_admissions_insert AFTER INSERT ON admissions
+        WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN
+            INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('admissions', NEW.admission_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_admissions_update AFTER UPDATE ON admissions
+        WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN
+            INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('admissions', NEW.admission_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_admissions_delete AFTER DELETE ON admissions
+        WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN
+            INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('admissions', OLD.admission_id);
+        END;
         """
         self.cursor.executescript(schema)
         self.conn.commit()
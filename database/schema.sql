@@ -4,4 +4,22 @@ CREATE TABLE IF NOT EXISTS patients ( patient_id INTEGER PRIMARY KEY AUTOINCREME
 
 CREATE TABLE IF NOT EXISTS admissions ( admission_id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id INTEGER NOT NULL, bed_id INTEGER NOT NULL, date_in TEXT NOT NULL, date_out TEXT, FOREIGN KEY (patient_id) REFERENCES patients(patient_id), FOREIGN KEY (bed_id) REFERENCES beds(bed_id) );
 
-CREATE TABLE IF NOT EXISTS users ( user_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, password_hash TEXT NOT NULL, role TEXT NOT NULL );
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_admissions_date_in ON admissions(date_in);
+
+CREATE TABLE IF NOT EXISTS users ( user_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, password_hash TEXT NOT NULL, role TEXT NOT NULL );
+
+CREATE TABLE IF NOT EXISTS state_changes ( change_id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, row_id INTEGER NOT NULL, UNIQUE (table_name, row_id) );
+
+CREATE TABLE IF NOT EXISTS snapshot_meta ( id INTEGER PRIMARY KEY CHECK (id = 1), pruned_through INTEGER NOT NULL, db_id INTEGER NOT NULL );
+
+CREATE TRIGGER IF NOT EXISTS trg_beds_insert AFTER INSERT ON beds WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('beds', NEW.bed_id); END;
+
+CREATE TRIGGER IF NOT EXISTS trg_beds_update AFTER UPDATE ON beds WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('beds', NEW.bed_id); END;
+
+CREATE TRIGGER IF NOT EXISTS trg_beds_delete AFTER DELETE ON beds WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('beds', OLD.bed_id); END;
+
+CREATE TRIGGER IF NOT EXISTS trg_admissions_insert AFTER INSERT ON admissions WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('admissions', NEW.admission_id); END;
+
+CREATE TRIGGER IF NOT EXISTS trg_admissions_update AFTER UPDATE ON admissions WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('admissions', NEW.admission_id); END;
+
+CREATE TRIGGER IF NOT EXISTS trg_admissions_delete AFTER DELETE ON admissions WHEN EXISTS (SELECT 1 FROM snapshot_meta) BEGIN INSERT OR REPLACE INTO state_changes (table_name, row_id) VALUES ('admissions', OLD.admission_id); END;
\ No newline at end of file
@@ -10,48 +10,69 @@ class AdmissionManager:
 
     def admit(self, patient_id, bed_id, date_in=None):
         date_in = date_in or datetime.now().strftime("%Y-%m-%d")
-        # ensure bed exists and is available
-        bed = self.db.fetch_one("SELECT * FROM beds WHERE bed_id=?", (bed_id,))
-        if not bed:
-            raise ValueError("Bed not found")
-        if bed['status'] == 'occupied':
-            raise ValueError("Bed is occupied")
-        self.db.execute_query("INSERT INTO admissions (patient_id, bed_id, date_in) VALUES (?, ?, ?)",
-                              (patient_id, bed_id, date_in))
-        self.bed_manager.assign_bed(bed_id)
+        # check and write in one transaction so concurrent clients can't claim the same bed
+        with self.db.transaction():
+            # ensure bed exists and is available
+            bed = self.db.fetch_one(
+                "SELECT * FROM beds WHERE bed_id=?", (bed_id,))
+            if not bed:
+                raise ValueError("Bed not found")
+            if bed['status'] == 'occupied':
+                raise ValueError("Bed is occupied")
+            cur = self.db.execute_query("INSERT INTO admissions (patient_id, bed_id, date_in) VALUES (?, ?, ?)",
+                                        (patient_id, bed_id, date_in))
+            admission_id = cur.lastrowid
+            self.bed_manager.assign_bed(bed_id)
         # return admission row
-        return self.db.fetch_one("SELECT * FROM admissions ORDER BY admission_id DESC LIMIT 1")
+        return self.db.fetch_one("SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
 
     def discharge(self, admission_id, date_out=None):
         date_out = date_out or datetime.now().strftime("%Y-%m-%d")
-        adm = self.db.fetch_one(
-            "SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
-        if not adm:
-            raise ValueError("Admission not found")
-        if adm['date_out']:
-            raise ValueError("Already discharged")
-        self.db.execute_query(
-            "UPDATE admissions SET date_out=? WHERE admission_id=?", (date_out, admission_id))
-        # free bed
-        self.bed_manager.free_bed(adm['bed_id'])
+        with self.db.transaction():
+            adm = self.db.fetch_one(
+                "SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
+            if not adm:
+                raise ValueError("Admission not found")
+            if adm['date_out']:
+                raise ValueError("Already discharged")
+            self.db.execute_query(
+                "UPDATE admissions SET date_out=? WHERE admission_id=?", (date_out, admission_id))
+            # free bed
+            self.bed_manager.free_bed(adm['bed_id'])
+        return self.db.fetch_one("SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
+
+    def reinstate(self, admission_id):
+        """Reopen a discharged admission on its old bed (undo of discharge)."""
+        with self.db.transaction():
+            adm = self.db.fetch_one(
+                "SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
+            if not adm:
+                raise ValueError("Admission not found")
+            if not adm['date_out']:
+                raise ValueError("Admission is not discharged")
+            self.db.execute_query(
+                "UPDATE admissions SET date_out=NULL WHERE admission_id=?", (admission_id,))
+            # raises if another admission took the bed; the whole undo rolls back
+            self.bed_manager.assign_bed(adm['bed_id'])
         return self.db.fetch_one("SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
 
     def transfer(self, admission_id, new_bed_id):
-        adm = self.db.fetch_one(
-            "SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
-        if not adm:
-            raise ValueError("Admission not found")
-        if adm['date_out']:
-            raise ValueError("Cannot transfer discharged patient")
-        new_bed = self.db.fetch_one(
-            "SELECT * FROM beds WHERE bed_id=?", (new_bed_id,))
-        if not new_bed:
-            raise ValueError("Target bed not found")
-        if new_bed['status'] == 'occupied':
-            raise ValueError("Target bed occupied")
-        # free old bed and assign new bed
-        self.bed_manager.free_bed(adm['bed_id'])
-        self.bed_manager.assign_bed(new_bed_id)
-        self.db.execute_query(
-            "UPDATE admissions SET bed_id=? WHERE admission_id=?", (new_bed_id, admission_id))
+        with self.db.transaction():
+            adm = self.db.fetch_one(
+                "SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
+            if not adm:
+                raise ValueError("Admission not found")
+            if adm['date_out']:
+                raise ValueError("Cannot transfer discharged patient")
+            new_bed = self.db.fetch_one(
+                "SELECT * FROM beds WHERE bed_id=?", (new_bed_id,))
+            if not new_bed:
+                raise ValueError("Target bed not found")
+            if new_bed['status'] == 'occupied':
+                raise ValueError("Target bed occupied")
+            # free old bed and assign new bed
+            self.bed_manager.free_bed(adm['bed_id'])
+            self.bed_manager.assign_bed(new_bed_id)
+            self.db.execute_query(
+                "UPDATE admissions SET bed_id=? WHERE admission_id=?", (new_bed_id, admission_id))
         return self.db.fetch_one("SELECT * FROM admissions WHERE admission_id=?", (admission_id,))
@@ -34,16 +34,20 @@ class AlertManager:
             body=message, from_=self.from_phone, to=to)
         return getattr(msg, "sid", None)
 
-    def alert_if_critical_full(self):
+    def alert_if_critical_full(self, state=None):
         # check ICU and HDU capacity and send alert if full
         for ward in ("ICU", "HDU"):
-            total_row = self.db.fetch_one(
-                "SELECT COUNT(*) as total FROM beds WHERE ward_type=?", (ward,))
-            occupied_row = self.db.fetch_one(
-                "SELECT SUM(CASE WHEN status='occupied' THEN 1 ELSE 0 END) as occupied FROM beds WHERE ward_type=?",
-                (ward,))
-            total = total_row['total'] if total_row else 0
-            occupied = occupied_row['occupied'] or 0
+            if state is not None:
+                # ward counters from a refreshed BedState (see SnapshotManager)
+                total, occupied = state.ward_counts.get(ward, (0, 0))
+            else:
+                total_row = self.db.fetch_one(
+                    "SELECT COUNT(*) as total FROM beds WHERE ward_type=?", (ward,))
+                occupied_row = self.db.fetch_one(
+                    "SELECT SUM(CASE WHEN status='occupied' THEN 1 ELSE 0 END) as occupied FROM beds WHERE ward_type=?",
+                    (ward,))
+                total = total_row['total'] if total_row else 0
+                occupied = occupied_row['occupied'] or 0
             if total > 0 and occupied >= total:
                 msg = f"CRITICAL: {ward} is full ({occupied}/{total})"
                 if self.admin_phone:
@@ -21,13 +21,15 @@ class BedManager:
         return self.db.fetch_all("SELECT * FROM beds WHERE status='available'")
 
     def assign_bed(self, bed_id):
-        bed = self.db.fetch_one("SELECT * FROM beds WHERE bed_id=?", (bed_id,))
-        if not bed:
-            raise ValueError("Bed not found")
-        if bed['status'] == 'occupied':
-            raise ValueError("Bed already occupied")
-        self.db.execute_query(
-            "UPDATE beds SET status='occupied' WHERE bed_id=?", (bed_id,))
+        with self.db.transaction():
+            bed = self.db.fetch_one(
+                "SELECT * FROM beds WHERE bed_id=?", (bed_id,))
+            if not bed:
+                raise ValueError("Bed not found")
+            if bed['status'] == 'occupied':
+                raise ValueError("Bed already occupied")
+            self.db.execute_query(
+                "UPDATE beds SET status='occupied' WHERE bed_id=?", (bed_id,))
 
     def free_bed(self, bed_id):
         bed = self.db.fetch_one("SELECT * FROM beds WHERE bed_id=?", (bed_id,))
@@ -0,0 +1,368 @@
+from database.db_handler import DatabaseHandler
+from pathlib import Path
+import mmap
+import os
+import secrets
+import struct
+import tempfile
+
+
+class BedState:
+    """In-process view of bed status, ward counters and open admissions.
+
+    Bed and open-admission records stay in the state's own memory-mapped
+    snapshot, sorted by id and looked up by binary search; changes replayed
+    since the snapshot live in the `_beds` / `_admissions` overlays (None
+    marks a deleted bed or closed admission). Call close() to release the
+    mapping.
+    """
+    BED = struct.Struct("<qHH")  # bed_id, status index, ward index
+    ADMISSION = struct.Struct("<qqq")  # admission_id, patient_id, bed_id
+
+    def __init__(self, change_id=0, wards=None, ward_counts=None, statuses=None, buf=None,
+                 beds_offset=0, n_beds=0, admissions_offset=0, n_admissions=0):
+        self.change_id = change_id
+        self.wards = wards or []
+        self.ward_counts = ward_counts or {}
+        self.statuses = statuses or []
+        self._buf = buf
+        # change id of the mapped file, to tell whether saving would change it
+        self._file_change_id = change_id if buf is not None else None
+        self._beds_offset = beds_offset
+        self._n_beds = n_beds
+        self._admissions_offset = admissions_offset
+        self._n_admissions = n_admissions
+        self._beds = {}
+        self._admissions = {}
+
+    def close(self):
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
+            self._n_beds = self._n_admissions = 0
+
+    @property
+    def dirty(self):
+        """True if the state differs from the snapshot file it was mapped from."""
+        return (self._buf is None or bool(self._beds) or bool(self._admissions)
+                or self.change_id != self._file_change_id)
+
+    def _record(self, rec, offset, i):
+        return rec.unpack_from(self._buf, offset + i * rec.size)
+
+    def _find(self, rec, offset, n, key):
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(rec, offset, mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < n:
+            found = self._record(rec, offset, lo)
+            if found[0] == key:
+                return found
+        return None
+
+    def _merged(self, rec, offset, n, overlay, decode):
+        """Yield (key, *fields) from the mapped records and overlay in key order."""
+        keys = sorted(overlay)
+        j = 0
+        for i in range(n):
+            found = self._record(rec, offset, i)
+            while j < len(keys) and keys[j] < found[0]:
+                if overlay[keys[j]]:
+                    yield (keys[j],) + overlay[keys[j]]
+                j += 1
+            if j < len(keys) and keys[j] == found[0]:
+                if overlay[keys[j]]:
+                    yield (keys[j],) + overlay[keys[j]]
+                j += 1
+                continue
+            yield (found[0],) + decode(found)
+        for key in keys[j:]:
+            if overlay[key]:
+                yield (key,) + overlay[key]
+
+    def _decode_bed(self, found):
+        return self.wards[found[2]], self.statuses[found[1]]
+
+    def bed(self, bed_id):
+        """Return (ward_type, status) for a bed, or None if it does not exist."""
+        if bed_id in self._beds:
+            return self._beds[bed_id]
+        found = self._find(self.BED, self._beds_offset, self._n_beds, bed_id)
+        return self._decode_bed(found) if found else None
+
+    def iter_beds(self):
+        """Yield (bed_id, ward_type, status) in bed_id order."""
+        return self._merged(self.BED, self._beds_offset, self._n_beds, self._beds,
+                            self._decode_bed)
+
+    def set_bed(self, bed_id, ward_type=None, status=None):
+        """Record a bed's current state (ward_type None means deleted) and adjust counters."""
+        old = self.bed(bed_id)
+        if old:
+            counts = self.ward_counts[old[0]]
+            counts[0] -= 1
+            counts[1] -= old[1] == "occupied"
+        if ward_type is None:
+            self._beds[bed_id] = None
+            return
+        if ward_type not in self.ward_counts:
+            self.ward_counts[ward_type] = [0, 0]
+        counts = self.ward_counts[ward_type]
+        counts[0] += 1
+        counts[1] += status == "occupied"
+        self._beds[bed_id] = (ward_type, status)
+
+    def admission(self, admission_id):
+        """Return (patient_id, bed_id) for an open admission, or None."""
+        if admission_id in self._admissions:
+            return self._admissions[admission_id]
+        found = self._find(self.ADMISSION, self._admissions_offset, self._n_admissions,
+                           admission_id)
+        return found[1:] if found else None
+
+    def iter_open_admissions(self):
+        """Yield (admission_id, patient_id, bed_id) in admission_id order."""
+        return self._merged(self.ADMISSION, self._admissions_offset, self._n_admissions,
+                            self._admissions, lambda found: found[1:])
+
+    def set_admission(self, admission_id, patient_id=None, bed_id=None):
+        """Record an open admission (patient_id None means closed or deleted)."""
+        self._admissions[admission_id] = None if patient_id is None else (
+            patient_id, bed_id)
+
+
+class SnapshotManager:
+    """Writes and warm-loads a binary snapshot of BedState.
+
+    Once a SnapshotManager has been used on a database, triggers keep one
+    `state_changes` entry per changed bed or admission, holding the latest
+    change id. A snapshot at change id X is usable if it carries the
+    database's random `db_id` from `snapshot_meta` and X is at least the
+    `pruned_through` watermark; loading it re-reads only the rows logged
+    after X.
+    """
+    MAGIC = b"HBMS"
+    VERSION = 3
+    # magic, version, db_id, change_id, wards, statuses, beds, open admissions
+    HEADER = struct.Struct("<4sHqqIIII")
+    WARD = struct.Struct("<Hqq")  # name length, total, occupied
+    NAME = struct.Struct("<H")  # status name length
+    # save a fresh snapshot on load once this many rows are waiting to replay
+    COMPACT_AFTER = 50000
+
+    def __init__(self, db: DatabaseHandler, path=None):
+        self.db = db
+        self.path = Path(path or f"{db.db_path}.snapshot")
+
+    def current_change_id(self):
+        row = self.db.fetch_one(
+            "SELECT seq FROM sqlite_sequence WHERE name='state_changes'")
+        return row["seq"] if row else 0
+
+    def pruned_through(self):
+        row = self.db.fetch_one(
+            "SELECT pruned_through FROM snapshot_meta WHERE id=1")
+        return row["pruned_through"] if row else 0
+
+    def database_id(self):
+        """Return this database's snapshot id, creating it (and turning on change logging)."""
+        self.db.execute_query(
+            "INSERT OR IGNORE INTO snapshot_meta (id, pruned_through, db_id) VALUES (1, 0, ?)",
+            (secrets.randbits(63),))
+        return self.db.fetch_one("SELECT db_id FROM snapshot_meta WHERE id=1")["db_id"]
+
+    def load(self):
+        """Return a BedState, warm-started from the snapshot file when it is usable.
+
+        Also prunes log entries the snapshot file already covers, and writes a
+        new snapshot if the replay backlog has grown past COMPACT_AFTER.
+        """
+        state = self._read_snapshot(self.path, self.database_id())
+        if state is not None:
+            base = state.change_id
+            if self._replay(state):
+                self._prune(base)
+            else:
+                state.close()
+                state = None
+        if state is None:
+            state = self.rebuild()
+        pending = self.db.fetch_one(
+            "SELECT COUNT(*) AS n FROM state_changes")["n"]
+        if pending > self.COMPACT_AFTER:
+            try:
+                self.save(state)
+            except OSError:
+                # compaction is opportunistic; the replayed state is still current
+                pass
+        return state
+
+    def rebuild(self):
+        """Build a BedState from full-table reads."""
+        self.db.conn.commit()
+        cur = self.db.conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            row = cur.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name='state_changes'").fetchone()
+            state = BedState(change_id=row["seq"] if row else 0)
+            for bed in cur.execute("SELECT bed_id, ward_type, status FROM beds"):
+                state.set_bed(bed["bed_id"], bed["ward_type"], bed["status"])
+            for adm in cur.execute(
+                    "SELECT admission_id, patient_id, bed_id FROM admissions WHERE date_out IS NULL"):
+                state.set_admission(
+                    adm["admission_id"], adm["patient_id"], adm["bed_id"])
+        finally:
+            self.db.conn.commit()
+            cur.close()
+        return state
+
+    def refresh(self, state):
+        """Bring a state up to date with the database, rebuilding if deltas are missing."""
+        if self._replay(state):
+            return state
+        state.close()
+        return self.rebuild()
+
+    def save(self, state):
+        """Write the state to the snapshot file, remap it and prune change-log entries it covers.
+
+        Does nothing if the state is unchanged since its snapshot file was written.
+        """
+        if not state.dirty:
+            return self.path
+        db_id = self.database_id()
+        beds = list(state.iter_beds())
+        admissions = list(state.iter_open_admissions())
+        wards = sorted(state.ward_counts)
+        ward_index = {w: i for i, w in enumerate(wards)}
+        statuses = sorted({status for _, _, status in beds})
+        status_index = {s: i for i, s in enumerate(statuses)}
+        # per-writer temp file so concurrent saves never share one
+        with tempfile.NamedTemporaryFile(dir=self.path.parent, prefix=self.path.name + ".",
+                                         suffix=".tmp", delete=False) as f:
+            tmp = Path(f.name)
+            try:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, db_id, state.change_id,
+                                         len(wards), len(statuses), len(beds), len(admissions)))
+                for w in wards:
+                    name = w.encode()
+                    total, occupied = state.ward_counts[w]
+                    f.write(self.WARD.pack(len(name), total, occupied))
+                    f.write(name)
+                for s in statuses:
+                    name = s.encode()
+                    f.write(self.NAME.pack(len(name)))
+                    f.write(name)
+                for bed_id, ward, status in beds:
+                    f.write(BedState.BED.pack(
+                        bed_id, status_index[status], ward_index[ward]))
+                for adm in admissions:
+                    f.write(BedState.ADMISSION.pack(*adm))
+            except BaseException:
+                f.close()
+                tmp.unlink()
+                raise
+        try:
+            os.replace(tmp, self.path)
+        except PermissionError:
+            # Windows can't replace a mapped file; release ours and retry
+            state.close()
+            try:
+                os.replace(tmp, self.path)
+            except OSError:
+                tmp.unlink()
+                raise
+        except OSError:
+            tmp.unlink()
+            raise
+        fresh = self._read_snapshot(self.path, db_id)
+        if fresh is None:
+            # another client replaced the file with something unusable; keep a
+            # working state rather than one pointing at a closed mapping
+            fresh = self.rebuild()
+        state.close()
+        state.__dict__.update(fresh.__dict__)
+        self._prune(state.change_id)
+        return self.path
+
+    def _prune(self, change_id):
+        with self.db.transaction():
+            self.db.execute_query(
+                "DELETE FROM state_changes WHERE change_id <= ?", (change_id,))
+            self.db.execute_query(
+                "UPDATE snapshot_meta SET pruned_through = MAX(pruned_through, ?) WHERE id=1",
+                (change_id,))
+
+    def _read_snapshot(self, path, db_id):
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, file_db_id, change_id, n_wards, n_statuses, n_beds, n_open = \
+                self.HEADER.unpack_from(mm, 0)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError("Unrecognised snapshot")
+            if file_db_id != db_id:
+                raise ValueError("Snapshot belongs to another database")
+            offset = self.HEADER.size
+            wards, counts = [], {}
+            for _ in range(n_wards):
+                size, total, occupied = self.WARD.unpack_from(mm, offset)
+                offset += self.WARD.size
+                name = mm[offset:offset + size].decode()
+                offset += size
+                wards.append(name)
+                counts[name] = [total, occupied]
+            statuses = []
+            for _ in range(n_statuses):
+                (size,) = self.NAME.unpack_from(mm, offset)
+                offset += self.NAME.size
+                statuses.append(mm[offset:offset + size].decode())
+                offset += size
+            beds_offset = offset
+            admissions_offset = beds_offset + n_beds * BedState.BED.size
+            if admissions_offset + n_open * BedState.ADMISSION.size != len(mm):
+                raise ValueError("Truncated snapshot")
+        except (struct.error, ValueError, UnicodeDecodeError):
+            mm.close()
+            return None
+        return BedState(change_id, wards, counts, statuses, mm, beds_offset, n_beds,
+                        admissions_offset, n_open)
+
+    def _replay(self, state):
+        """Apply logged changes newer than the state; False if the log no longer covers them."""
+        latest = self.current_change_id()
+        if latest < state.change_id or self.pruned_through() > state.change_id:
+            return False
+        if latest == state.change_id:
+            return True
+        # no upper bound: a row re-logged after `latest` was read has moved past it
+        changes = self.db.fetch_all(
+            "SELECT table_name, row_id FROM state_changes WHERE change_id > ?", (state.change_id,))
+        for change in changes:
+            if change["table_name"] == "beds":
+                bed = self.db.fetch_one(
+                    "SELECT ward_type, status FROM beds WHERE bed_id=?", (change["row_id"],))
+                if bed:
+                    state.set_bed(change["row_id"],
+                                  bed["ward_type"], bed["status"])
+                else:
+                    state.set_bed(change["row_id"])
+            else:
+                adm = self.db.fetch_one(
+                    "SELECT patient_id, bed_id, date_out FROM admissions WHERE admission_id=?",
+                    (change["row_id"],))
+                if adm and not adm["date_out"]:
+                    state.set_admission(
+                        change["row_id"], adm["patient_id"], adm["bed_id"])
+                else:
+                    state.set_admission(change["row_id"])
+        state.change_id = latest
+        return True
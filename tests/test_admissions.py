@@ -38,6 +38,24 @@ class TestAdmissionFlow(unittest.TestCase):
             "SELECT * FROM beds WHERE bed_id=?", (self.bed["bed_id"],))
         self.assertEqual(bedrow2["status"], "available")
 
+    def test_reinstate_is_atomic(self):
+        adm = self.am.admit(self.patient["patient_id"], self.bed["bed_id"])
+        self.am.discharge(adm["admission_id"])
+        # another patient takes the bed before the discharge is undone
+        other = self.am.admit(self.patient["patient_id"], self.bed["bed_id"])
+        with self.assertRaises(ValueError):
+            self.am.reinstate(adm["admission_id"])
+        row = self.db.fetch_one(
+            "SELECT * FROM admissions WHERE admission_id=?", (adm["admission_id"],))
+        self.assertIsNotNone(row["date_out"])
+        # once the bed is free again the undo succeeds
+        self.am.discharge(other["admission_id"])
+        row = self.am.reinstate(adm["admission_id"])
+        self.assertIsNone(row["date_out"])
+        bedrow = self.db.fetch_one(
+            "SELECT * FROM beds WHERE bed_id=?", (self.bed["bed_id"],))
+        self.assertEqual(bedrow["status"], "occupied")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from benchmarks.stress_admissions import run_stress, check_invariants
+from database.db_handler import DatabaseHandler
+
+
+class TestConcurrentAdmissions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "stress.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_threads_keep_invariants(self):
+        # generous busy timeout: this test is about correctness, not retry rates
+        res = run_stress(self.db_path, workers=6, ops=100, beds=8, seed=1, busy_timeout_ms=5000)
+        self.assertEqual(res["violations"], [])
+        self.assertEqual(res["failed"], 0)
+        self.assertGreater(res["ops"], 0)
+        self.assertGreater(res["transactions"], 0)
+
+    def test_parallel_processes_keep_invariants(self):
+        res = run_stress(self.db_path, workers=4, ops=100, beds=8, mode="process", seed=2,
+                         busy_timeout_ms=5000)
+        self.assertEqual(res["violations"], [])
+
+    def test_detects_double_booking(self):
+        run_stress(self.db_path, workers=1, ops=0, beds=2)
+        db = DatabaseHandler(self.db_path)
+        db.execute_query(
+            "INSERT INTO admissions (patient_id, bed_id, date_in) VALUES (1, 1, '2024-01-01')")
+        db.execute_query(
+            "INSERT INTO admissions (patient_id, bed_id, date_in) VALUES (2, 1, '2024-01-01')")
+        db.close()
+        problems = check_invariants(self.db_path)
+        self.assertTrue(any("2 open admissions" in p for p in problems))
+        self.assertTrue(any("is available" in p for p in problems))
+
+
+if __name__ == "__main__":
+    unittest.main()
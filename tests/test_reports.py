@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from database.db_handler import DatabaseHandler
+from utils.report_generator import ReportGenerator
+
+
+class TestReportExport(unittest.TestCase):
+    def setUp(self):
+        self.db = DatabaseHandler(":memory:")
+        self.db.initialize_db()
+        self.report = ReportGenerator(self.db)
+        for i, date_in in enumerate(("2024-01-05", "2024-02-10", "2024-04-01"), start=1):
+            self.db.execute_query("INSERT INTO admissions (patient_id, bed_id, date_in) VALUES (?, ?, ?)",
+                                  (i, i, date_in))
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        try:
+            self.db.close()
+        except Exception:
+            pass
+
+    def test_csv_with_projection_and_date_range(self):
+        path = os.path.join(self.tmp.name, "q1.csv")
+        n = self.report.export_admissions(path, "csv", columns=["admission_id", "date_in"],
+                                          date_from="2024-01-01", date_to="2024-03-31", batch_size=1)
+        self.assertEqual(n, 2)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["admission_id", "date_in"])
+        self.assertEqual([r[1] for r in rows[1:]], ["2024-01-05", "2024-02-10"])
+
+    def test_jsonl_and_columnar_roundtrip(self):
+        self.db.execute_query(
+            "UPDATE admissions SET date_out='2024-02-20' WHERE admission_id=2")
+        jsonl = os.path.join(self.tmp.name, "all.jsonl")
+        col = os.path.join(self.tmp.name, "all.bin")
+        self.assertEqual(self.report.export_admissions(jsonl, "jsonl", batch_size=2), 3)
+        self.assertEqual(self.report.export_admissions(col, "columnar", batch_size=2), 3)
+        with open(jsonl, encoding="utf-8") as f:
+            from_jsonl = [json.loads(line) for line in f]
+        self.assertEqual(list(ReportGenerator.read_columnar(col)), from_jsonl)
+        self.assertIsNone(from_jsonl[0]["date_out"])
+        self.assertEqual(from_jsonl[1]["date_out"], "2024-02-20")
+
+    def test_date_filter_streams_in_date_order(self):
+        self.db.execute_query("INSERT INTO admissions (patient_id, bed_id, date_in) VALUES (?, ?, ?)",
+                              (4, 4, "2024-01-01"))
+        batches = self.report.iter_admissions(["admission_id", "date_in"], date_from="2024-01-01",
+                                              date_to="2024-03-31")
+        rows = [r for batch in batches for r in batch]
+        self.assertEqual(rows, [(4, "2024-01-01"), (1, "2024-01-05"), (2, "2024-02-10")])
+
+    def test_rejects_unknown_column(self):
+        with self.assertRaises(ValueError):
+            self.report.export_admissions(os.path.join(self.tmp.name, "x.csv"),
+                                          columns=["admission_id; DROP TABLE beds"])
+
+
+if __name__ == "__main__":
+    unittest.main()
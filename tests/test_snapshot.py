@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+from database.db_handler import DatabaseHandler
+from managers.alert_manager import AlertManager
+from managers.bed_manager import BedManager
+from managers.admission_manager import AdmissionManager
+from managers.snapshot_manager import SnapshotManager
+from utils.report_generator import ReportGenerator
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "hospital.db")
+        self.states = []
+        self.open_db()
+        for ward in ("ICU", "ICU", "General"):
+            self.bm.add_bed(ward, [])
+        self.adm = self.am.admit(1, 1)
+
+    def tearDown(self):
+        for state in self.states:
+            state.close()
+        self.db.close()
+        self.tmp.cleanup()
+
+    def open_db(self):
+        self.db = DatabaseHandler(self.db_path)
+        self.db.initialize_db()
+        self.bm = BedManager(self.db)
+        self.am = AdmissionManager(self.db, self.bm)
+        self.sm = SnapshotManager(self.db)
+
+    def reopen(self):
+        self.db.close()
+        self.open_db()
+
+    def load(self):
+        state = self.sm.load()
+        self.states.append(state)
+        return state
+
+    def test_roundtrip(self):
+        self.sm.save(self.load())
+        self.reopen()
+        state = self.load()
+        self.assertEqual(state.ward_counts, {"General": [1, 0], "ICU": [2, 1]})
+        self.assertEqual(state.bed(1), ("ICU", "occupied"))
+        self.assertIsNone(state.bed(99))
+        self.assertEqual(list(state.iter_open_admissions()), [(self.adm["admission_id"], 1, 1)])
+        self.assertEqual(state.admission(self.adm["admission_id"]), (1, 1))
+
+    def test_stale_snapshot_replays_deltas(self):
+        self.sm.save(self.load())
+        self.reopen()
+        self.am.transfer(self.adm["admission_id"], 3)
+        self.bm.add_bed("HDU", [])
+        state = self.load()
+        self.assertEqual(state.ward_counts,
+                         {"General": [1, 1], "HDU": [1, 0], "ICU": [2, 0]})
+        self.assertEqual(list(state.iter_open_admissions()), [(self.adm["admission_id"], 1, 3)])
+        self.assertEqual(list(state.iter_beds()), list(self.sm.rebuild().iter_beds()))
+
+    def test_pruned_log_forces_rebuild(self):
+        old = self.load()
+        self.sm.save(self.load())
+        self.am.discharge(self.adm["admission_id"])
+        self.sm.save(self.load())
+        state = self.sm.refresh(old)
+        self.assertEqual(list(state.iter_open_admissions()), [])
+        self.assertEqual(state.ward_counts["ICU"], [2, 0])
+
+    def test_states_keep_their_own_mapping(self):
+        self.sm.save(self.load())
+        first = self.load()
+        second = self.load()
+        self.sm.save(second)
+        self.assertEqual(first.bed(1), ("ICU", "occupied"))
+        self.assertEqual(second.bed(1), ("ICU", "occupied"))
+
+    def test_other_statuses_survive_snapshot(self):
+        self.db.execute_query("UPDATE beds SET status='cleaning' WHERE bed_id=2")
+        self.sm.save(self.load())
+        self.reopen()
+        self.assertEqual(self.load().bed(2), ("ICU", "cleaning"))
+
+    def test_log_keeps_one_row_per_changed_row_and_compacts_on_load(self):
+        self.sm.save(self.load())
+        for _ in range(3):
+            self.am.transfer(self.adm["admission_id"], 2)
+            self.am.transfer(self.adm["admission_id"], 1)
+        count = "SELECT COUNT(*) AS n FROM state_changes"
+        # admission 1, bed 1 and bed 2
+        self.assertEqual(self.db.fetch_one(count)["n"], 3)
+        self.reopen()
+        self.load()
+        # still needed to replay onto the snapshot file
+        self.assertEqual(self.db.fetch_one(count)["n"], 3)
+        self.sm.COMPACT_AFTER = 2
+        state = self.load()
+        self.assertEqual(self.db.fetch_one(count)["n"], 0)
+        self.assertEqual(state.bed(1), ("ICU", "occupied"))
+
+    def test_snapshot_from_recreated_database_is_ignored(self):
+        self.sm.save(self.load())
+        self.db.close()
+        os.remove(self.db_path)
+        self.open_db()
+        state = self.load()
+        self.assertEqual(state.ward_counts, {})
+        self.assertIsNone(state.bed(1))
+
+    def test_unchanged_state_is_not_rewritten(self):
+        self.sm.save(self.load())
+        self.reopen()
+        state = self.load()
+        mtime = os.stat(self.sm.path).st_mtime_ns
+        self.sm.save(self.sm.refresh(state))
+        self.assertEqual(os.stat(self.sm.path).st_mtime_ns, mtime)
+        self.bm.add_bed("HDU", [])
+        self.sm.save(self.sm.refresh(state))
+        self.assertNotEqual(os.stat(self.sm.path).st_mtime_ns, mtime)
+        self.assertEqual(state.bed(4), ("HDU", "available"))
+        self.assertEqual(os.listdir(self.tmp.name).count("hospital.db.snapshot"), 1)
+        self.assertFalse([n for n in os.listdir(self.tmp.name) if n.endswith(".tmp")])
+
+    def test_save_keeps_state_usable_if_remap_fails(self):
+        state = self.load()
+        self.sm._read_snapshot = lambda path, db_id: None
+        self.sm.save(state)
+        self.assertEqual(state.bed(1), ("ICU", "occupied"))
+        self.assertEqual(state.admission(self.adm["admission_id"]), (1, 1))
+
+    def test_reports_and_alerts_read_state(self):
+        self.am.admit(2, 2)
+        state = self.load()
+        self.db.execute_query("DELETE FROM beds")
+        report = ReportGenerator(self.db)
+        self.assertEqual(report.generate_occupancy(state),
+                         [{"ward_type": "General", "total": 1, "occupied": 0},
+                          {"ward_type": "ICU", "total": 2, "occupied": 2}])
+        self.assertEqual(report.list_free_beds(state),
+                         [{"bed_id": 3, "ward_type": "General", "status": "available"}])
+        alerts = AlertManager(self.db)
+        sent = []
+        alerts.admin_phone = "123"
+        alerts._send_sms = lambda to, msg: sent.append(msg)
+        alerts.alert_if_critical_full(state)
+        self.assertEqual(sent, ["CRITICAL: ICU is full (2/2)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,180 @@
+import csv
+import json
+import struct
+import sys
+from array import array
 from database.db_handler import DatabaseHandler
 
 
 class ReportGenerator:
+    ADMISSION_COLUMNS = ("admission_id", "patient_id",
+                         "bed_id", "date_in", "date_out")
+    COLUMN_TYPES = {"admission_id": "int", "patient_id": "int",
+                    "bed_id": "int", "date_in": "text", "date_out": "text"}
+    EXPORT_FORMATS = ("csv", "jsonl", "columnar")
+    # columnar layout: magic, JSON header of column names and types, then
+    # blocks of <row count><column>..., terminated by a zero row count.
+    # Each column is a null flag (+ null bitmap), then either a packed int
+    # array or packed UTF-8 lengths followed by the concatenated bytes.
+    # Packed arrays start with the narrowest array typecode that fits.
+    COLUMNAR_MAGIC = b"HBMC2"
+    INT_CODES = (("b", -2 ** 7, 2 ** 7), ("h", -2 ** 15, 2 ** 15),
+                 ("i", -2 ** 31, 2 ** 31), ("q", -2 ** 63, 2 ** 63))
+
     def __init__(self, db: DatabaseHandler):
         self.db = db
 
-    def generate_occupancy(self):
+    def generate_occupancy(self, state=None):
+        # a refreshed BedState (see SnapshotManager) answers without scanning beds
+        if state is not None:
+            return [{"ward_type": w, "total": total, "occupied": occupied}
+                    for w, (total, occupied) in sorted(state.ward_counts.items()) if total]
         rows = self.db.fetch_all(
             "SELECT ward_type, COUNT(*) as total, SUM(CASE WHEN status='occupied' THEN 1 ELSE 0 END) as occupied FROM beds GROUP BY ward_type")
         return [dict(r) for r in rows]
 
-    def list_free_beds(self):
+    def list_free_beds(self, state=None):
+        if state is not None:
+            return [{"bed_id": bed_id, "ward_type": ward, "status": status}
+                    for bed_id, ward, status in state.iter_beds() if status == "available"]
         rows = self.db.fetch_all("SELECT * FROM beds WHERE status='available'")
         return [dict(r) for r in rows]
+
+    def iter_admissions(self, columns=None, date_from=None, date_to=None, batch_size=1000):
+        """Yield batches of admission row tuples without loading the whole table."""
+        columns = self._admission_columns(columns)
+        sql = f"SELECT {', '.join(columns)} FROM admissions WHERE 1=1"
+        params = []
+        if date_from:
+            sql += " AND date_in >= ?"
+            params.append(date_from)
+        if date_to:
+            sql += " AND date_in <= ?"
+            params.append(date_to)
+        # with a date filter, follow idx_admissions_date_in so SQLite streams
+        # rows instead of sorting the whole range before the first fetch
+        sql += " ORDER BY date_in, admission_id" if date_from or date_to else " ORDER BY admission_id"
+        # own cursor so other queries on the handler don't reset this one
+        cur = self.db.conn.cursor()
+        try:
+            cur.execute(sql, tuple(params))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [tuple(r) for r in rows]
+        finally:
+            cur.close()
+
+    def export_admissions(self, path, fmt="csv", columns=None, date_from=None, date_to=None,
+                          batch_size=1000):
+        if fmt not in self.EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        columns = self._admission_columns(columns)
+        batches = self.iter_admissions(columns, date_from, date_to, batch_size)
+        count = 0
+        if fmt == "csv":
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for rows in batches:
+                    writer.writerows(rows)
+                    count += len(rows)
+        elif fmt == "jsonl":
+            with open(path, "w", encoding="utf-8") as f:
+                for rows in batches:
+                    f.writelines(json.dumps(dict(zip(columns, r))) + "\n"
+                                 for r in rows)
+                    count += len(rows)
+        else:
+            types = [self.COLUMN_TYPES[c] for c in columns]
+            with open(path, "wb") as f:
+                f.write(self.COLUMNAR_MAGIC)
+                header = json.dumps(
+                    {"columns": list(columns), "types": types}).encode()
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                for rows in batches:
+                    f.write(struct.pack("<I", len(rows)))
+                    for kind, values in zip(types, zip(*rows)):
+                        self._write_column(f, kind, values)
+                    count += len(rows)
+                f.write(struct.pack("<I", 0))
+        return count
+
+    @classmethod
+    def read_columnar(cls, path):
+        """Yield rows as dicts from a file written with fmt='columnar'."""
+        with open(path, "rb") as f:
+            if f.read(len(cls.COLUMNAR_MAGIC)) != cls.COLUMNAR_MAGIC:
+                raise ValueError("Not a columnar export file")
+            (size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(size))
+            columns = header["columns"]
+            while True:
+                (nrows,) = struct.unpack("<I", f.read(4))
+                if not nrows:
+                    break
+                values = [cls._read_column(f, kind, nrows)
+                          for kind in header["types"]]
+                for row in zip(*values):
+                    yield dict(zip(columns, row))
+
+    def _admission_columns(self, columns):
+        columns = tuple(columns or self.ADMISSION_COLUMNS)
+        unknown = [c for c in columns if c not in self.ADMISSION_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown admission columns: {', '.join(unknown)}")
+        return columns
+
+    @classmethod
+    def _write_column(cls, f, kind, values):
+        nulls = [v is None for v in values]
+        if any(nulls):
+            bitmap = bytearray((len(values) + 7) // 8)
+            for i, null in enumerate(nulls):
+                if null:
+                    bitmap[i >> 3] |= 1 << (i & 7)
+            f.write(b"\x01")
+            f.write(bitmap)
+        else:
+            f.write(b"\x00")
+        if kind == "int":
+            f.write(cls._pack_ints([0 if v is None else v for v in values]))
+        else:
+            encoded = [str(v).encode() for v in values if v is not None]
+            f.write(cls._pack_ints([len(e) for e in encoded]))
+            f.write(b"".join(encoded))
+
+    @classmethod
+    def _read_column(cls, f, kind, nrows):
+        nulls = [False] * nrows
+        if f.read(1) == b"\x01":
+            bitmap = f.read((nrows + 7) // 8)
+            nulls = [bool(bitmap[i >> 3] >> (i & 7) & 1)
+                     for i in range(nrows)]
+        if kind == "int":
+            ints = cls._unpack_ints(f, nrows)
+            return [None if null else v for null, v in zip(nulls, ints)]
+        lengths = iter(cls._unpack_ints(f, nrows - sum(nulls)))
+        values = []
+        for null in nulls:
+            values.append(None if null else f.read(next(lengths)).decode())
+        return values
+
+    @classmethod
+    def _pack_ints(cls, values):
+        lo, hi = (min(values), max(values)) if values else (0, 0)
+        code = next(c for c, cmin, cmax in cls.INT_CODES if cmin <= lo and hi < cmax)
+        packed = array(code, values)
+        if sys.byteorder == "big":
+            packed.byteswap()
+        return code.encode() + packed.tobytes()
+
+    @staticmethod
+    def _unpack_ints(f, n):
+        packed = array(f.read(1).decode())
+        packed.frombytes(f.read(packed.itemsize * n))
+        if sys.byteorder == "big":
+            packed.byteswap()
+        return packed.tolist()